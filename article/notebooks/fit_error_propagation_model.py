@@ -1,8 +1,10 @@
 """Run a script that does error propagation."""
 import argparse
 import os
+import shutil
 
 import arviz as az
+import numpy as np
 import pandas as pd
 from cmdstanpy import CmdStanModel  # type: ignore
 from scipy.special import logit
@@ -25,8 +27,10 @@ IDATA_FILE = os.path.join(HERE, "idata.json")
 # C_FEED_MEASURED = 93.75
 C_FEED_MEASURED = 0
 STAN_FILE = os.path.join(HERE, "..", "src", "stan", "model.stan")
+EXE_FILE = os.path.splitext(STAN_FILE)[0] + ".exe"
 DEFAULT_SAMPLE_KWARGS = {
     "chains": 4,
+    "parallel_chains": 4,
     "iter_warmup": 2000,
     "iter_sampling": 1000,
     "adapt_delta": 0.9999,
@@ -59,6 +63,19 @@ PRIORS = {
 }
 
 
+def load_model() -> CmdStanModel:
+    """Load the previously compiled model if present, otherwise compile it and
+    keep the executable next to the Stan file for the next run."""
+    try:
+        model = CmdStanModel(
+            exe_file=EXE_FILE, stan_file=STAN_FILE, compile=False
+        )
+    except ValueError:
+        model = CmdStanModel(stan_file=STAN_FILE, stanc_options={"O1": True})
+        shutil.copy(model.exe_file, EXE_FILE)  # type: ignore
+    return model
+
+
 def main():
     """Run main function"""
     parser = argparse.ArgumentParser()
@@ -74,22 +91,17 @@ def main():
         pd.read_csv(FEDBATCH_FILE, index_col=0)
         .dropna(subset=["sample_volume"])
         .drop_duplicates(subset=["timestamp"], keep="first")
-        .assign(
-            v_feed_interval=lambda df: (
-                df["v_feed_accum"]
-                .subtract(df["v_feed_accum"].shift(1))
-                .fillna(0)
-            )
-        )
     )
+    v_feed_accum = df["v_feed_accum"].to_numpy()
+    df["v_feed_interval"] = np.diff(v_feed_accum, prepend=v_feed_accum[0])
     data = {
         "N": len(df),
-        "y_v": df["v_volume"].values.tolist(),
-        "y_f": df["v_feed_interval"].values.tolist(),
-        "y_c": df["m_Biomass"].divide(df["v_volume"]).values.tolist(),
-        "y_s": df["sample_volume"].values.tolist(),
+        "y_v": df["v_volume"].to_numpy(),
+        "y_f": df["v_feed_interval"].to_numpy(),
+        "y_c": df["m_Biomass"].divide(df["v_volume"]).to_numpy(),
+        "y_s": df["sample_volume"].to_numpy(),
         "y_cfeed": C_FEED_MEASURED,
-        "t": df["timestamp"].values.tolist(),
+        "t": df["timestamp"].to_numpy(),
         "prior_sigma_v": PRIORS["sigma_v"],
         "prior_sigma_f": PRIORS["sigma_f"],
         "prior_sigma_c": PRIORS["sigma_c"],
@@ -103,15 +115,15 @@ def main():
         "prior_cfeed_nonzero": PRIORS["cfeed_nonzero"],
         "likelihood": 1,
     }
-    nonzero_time_steps = [t for t, f in zip(data["t"], data["y_f"]) if f > 0]
+    nonzero_time_steps = data["t"][data["y_f"] > 0].tolist()
     print(nonzero_time_steps)
-    model = CmdStanModel(stan_file=STAN_FILE)
+    model = load_model()
     sample_kwargs = {**DEFAULT_SAMPLE_KWARGS, **custom_sample_kwargs}
     mcmc = model.sample(data=data, **sample_kwargs)
     idata = az.from_cmdstanpy(
         mcmc,
         coords={
-            "time": df["timestamp"].values.tolist(),
+            "time": data["t"],
             # "nonzero": nonzero_time_steps,
         },
         dims={
@@ -12,12 +12,9 @@ online_dat_filepath = (
 )
 online_dat = pd.read_csv(online_dat_filepath, index_col=0)
 
-online_dat["Biolector row"] = online_dat["Biolector well"].str.extract(
-    r"([A-Z])"
-)
-online_dat["Biolector column"] = online_dat["Biolector well"].str.extract(
-    r"(\d.*)"
-)
+online_dat[["Biolector row", "Biolector column"]] = online_dat[
+    "Biolector well"
+].str.extract(r"([A-Z])(\d+)")
 
 # Rename columns
 online_dat = online_dat.rename(columns={"Biomass [LS Gain=3]": "Biomass concentration [light scatter]"})
@@ -55,9 +52,7 @@ strain_biolectorcolumn_map = {
     "07": "Yeast_strain_4",
     "08": "Yeast_strain_4",
 }
-df["Strain"] = df["Biolector column"].apply(
-    lambda x: strain_biolectorcolumn_map[x]
-)
+df["Strain"] = df["Biolector column"].map(strain_biolectorcolumn_map)
 
 # Keep only required columns
 df = df[
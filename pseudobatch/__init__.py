@@ -1,5 +1,6 @@
 import shutil
 import warnings
+from functools import lru_cache
 from pathlib import Path
 from .import_from_excel import process_excel_template
 # from .data_correction import pseudobatch_transform_multiple, pseudobatch_transform, pseudobatch_transform_pandas, accumulated_dilution_factor, convert_volumetric_rates_from_pseudo_to_real, pseudobatch_transform_pandas_by_group
@@ -48,8 +49,10 @@ def load_stan_model(name: str) -> cmdstanpy.CmdStanModel:
     return model
 
 
-ERROR_PROPAGATION = load_stan_model("error_propagation")
-
-
-# example: just print the info of the model
-print(ERROR_PROPAGATION.exe_info())
+@lru_cache(maxsize=None)
+def get_error_propagation_model() -> cmdstanpy.CmdStanModel:
+    """
+    Load the error propagation model on first use and reuse it afterwards.
+    The pre-built executable shipped with the wheel is used if present.
+    """
+    return load_stan_model("error_propagation")
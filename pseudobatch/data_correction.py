@@ -2,64 +2,149 @@ from typing import Iterable, Union
 
 import numpy as np
 import pandas as pd
-from numpy.typing import NDArray
+from numpy.typing import DTypeLike, NDArray
 
 
-def _shift(xs, n):
-    """Shifts the elements of a numpy array by n steps.
-
-    Numpy version of pandas .shift method.
-
-    Origin:
-    https://stackoverflow.com/questions/30399534/shift-elements-in-a-numpy-array
+def accumulated_dilution_factor(
+    after_sample_reactor_volume: NDArray,
+    sample_volume: NDArray,
+    dtype: DTypeLike = np.float64,
+) -> NDArray:
+    """Calculates the accumulated dilution factor.
 
     Parameters
     ----------
-    xs : NDArray
-        The array to be shifted
-    n : int
-        The number of steps to shift. Positive values shift to the right,
-        negative values shift to the left.
+    after_sample_reactor_volume : NDArray
+        The volume of the bioreactor. At the sampling time points, this has to
+        be the volume AFTER the sample was taken.
+    sample_volume : NDArray
+        The volume of the sample taken at each time point.
+    dtype : DTypeLike, optional
+        The floating point type used for the calculation, by default
+        np.float64. The inputs are converted to contiguous arrays of this
+        type.
 
     Returns
     -------
     NDArray
-        The shifted array. The first n elements are set to np.nan if n is
-        positive, the last n elements are set to np.nan if n is negative.
+        The accumulated dilution factor for each timepoint. The first value is
+        always 1.
     """
-    if n >= 0:
-        return np.concatenate((np.full(n, np.nan), xs[:-n]))
-    else:
-        return np.concatenate((xs[-n:], np.full(-n, np.nan)))
+    after_sample_reactor_volume = np.ascontiguousarray(
+        after_sample_reactor_volume, dtype=dtype
+    )
+    sample_volume = np.ascontiguousarray(sample_volume, dtype=dtype)
 
+    # The dilution factor of each interval is written straight into the
+    # output buffer, which is then turned into the running product in place.
+    dilution_factor = np.empty(
+        after_sample_reactor_volume.shape, dtype=dtype
+    )
+    dilution_factor[0] = 1  # The dilution factor of the first index is set to 1
+    np.add(
+        sample_volume[1:],
+        after_sample_reactor_volume[1:],
+        out=dilution_factor[1:],
+    )
+    dilution_factor[1:] /= after_sample_reactor_volume[:-1]
+    return np.cumprod(dilution_factor, out=dilution_factor)
 
-def accumulated_dilution_factor(
-    after_sample_reactor_volume: NDArray, sample_volume: NDArray
+
+def _pseudobatch_transform_batched(
+    measured_concentrations: NDArray,
+    reactor_volume: NDArray,
+    accumulated_feed: NDArray,
+    concentration_in_feed: NDArray,
+    sample_volume: NDArray,
+    dtype: DTypeLike = np.float64,
 ) -> NDArray:
-    """Calculates the accumulated dilution factor.
+    """Pseudo batch transformation of several species from the same reactor.
+
+    The accumulated dilution factor and the feed added in each interval only
+    depend on the reactor, so they are calculated once and shared by all
+    species.
 
     Parameters
     ----------
-    after_sample_reactor_volume : NDArray
-        The volume of the bioreactor. At the sampling time points, this has to
-        be the volume AFTER the sample was taken.
+    measured_concentrations : NDArray
+        a (T, S) NDArray with the measured concentrations, one column per
+        species.
+    reactor_volume : NDArray
+        a (T,) NDArray of the volumes just BEFORE sampling.
+    accumulated_feed : NDArray
+        a (T,) NDArray for a single feed or a (T, F) NDArray for F feeds.
+    concentration_in_feed : NDArray
+        a (F, S) NDArray with the concentration of each species in each feed.
+        A (1, S) NDArray applies the same concentration to every feed, and for
+        a single feed a (T, S) NDArray gives the concentration at each time
+        point.
     sample_volume : NDArray
-        The volume of the sample taken at each time point.
+        a (T,) NDArray of the sample volumes, 0 where no sample was taken.
+    dtype : DTypeLike, optional
+        the floating point type used for the calculation, by default
+        np.float64.
 
     Returns
     -------
     NDArray
-        The accumulated dilution factor for each timepoint. The first value is
-        always 1.
+        A (T, S) NDArray with the pseudo concentrations.
     """
+    # All inputs are converted to contiguous arrays of one dtype once, so the
+    # arithmetic below never has to upcast or work on strided data.
+    measured_concentrations = np.ascontiguousarray(
+        measured_concentrations, dtype=dtype
+    )
+    reactor_volume = np.ascontiguousarray(reactor_volume, dtype=dtype)
+    accumulated_feed = np.ascontiguousarray(accumulated_feed, dtype=dtype)
+    concentration_in_feed = np.ascontiguousarray(
+        concentration_in_feed, dtype=dtype
+    )
+    sample_volume = np.ascontiguousarray(sample_volume, dtype=dtype)
 
-    dilution_factor = (sample_volume + after_sample_reactor_volume) / _shift(
-        after_sample_reactor_volume, 1
+    for i in [
+        reactor_volume,
+        accumulated_feed,
+        sample_volume,
+    ]:
+        if np.isnan(i).any():
+            msg = (
+                "Nan was found in either the reactor volume, accumulated feed or "
+                "the sample volume. Replace nan with an appropriate value."
+                "For example, if no sample was taken, the sample volume should be "
+                "set to 0."
+            )
+            raise ValueError(msg)
+    adf = accumulated_dilution_factor(
+        reactor_volume - sample_volume, sample_volume, dtype=dtype
     )
-    dilution_factor = np.nan_to_num(
-        dilution_factor, copy=True, nan=1
-    )  # The dilution factor of the first index is set to 1
-    return np.cumprod(dilution_factor)
+
+    if accumulated_feed.ndim == 1:
+        # A single feed is handled as a feed matrix with one column
+        accumulated_feed = accumulated_feed[:, np.newaxis]
+
+    # The feed added during the first interval is 0. The differences are
+    # written into one buffer instead of prepending to a copy of the feed.
+    feed_in_interval = np.empty(accumulated_feed.shape, dtype=dtype)
+    feed_in_interval[0] = 0
+    np.subtract(
+        accumulated_feed[1:], accumulated_feed[:-1], out=feed_in_interval[1:]
+    )
+    # Amount of each species fed during each interval, summed over the feeds
+    if concentration_in_feed.shape[0] == accumulated_feed.shape[1]:
+        fed_species_term = feed_in_interval @ concentration_in_feed
+    else:
+        fed_species_term = (
+            feed_in_interval.sum(axis=1, keepdims=True) * concentration_in_feed
+        )
+    # Scale by adf / reactor_volume in the same buffer, so the only temporary
+    # of the elementwise pipeline is this (T,) scaling vector.
+    fed_species_term *= (adf / reactor_volume)[:, np.newaxis]
+
+    # Accumulate the fed term and subtract it in place to avoid temporaries
+    np.cumsum(fed_species_term, axis=0, out=fed_species_term)
+    pseudo_concentrations = measured_concentrations * adf[:, np.newaxis]
+    pseudo_concentrations -= fed_species_term
+    return pseudo_concentrations
 
 
 def pseudobatch_transform(
@@ -68,6 +153,7 @@ def pseudobatch_transform(
     accumulated_feed: NDArray,
     concentration_in_feed: Union[NDArray, float],
     sample_volume: NDArray,
+    dtype: DTypeLike = np.float64,
 ) -> NDArray:
     """Pseudo batch transformation function for a single species. This function
     transforms the measured concentrations to the pseudo concentrations.
@@ -98,62 +184,29 @@ def pseudobatch_transform(
         a NDArray of the sample volumes at given time points. The array should
     contain 0 at timepoints where no samples was taken
 
+    dtype : DTypeLike, optional
+
+        the floating point type used for the calculation, by default
+        np.float64. The inputs are converted to contiguous arrays of this type.
+        np.float32 halves the memory traffic of large parameter sweeps, but
+        only keeps about 7 significant digits.
+
     Returns
     -------
     NDArray
         A NDArray with the pseudo concentrations of the species.
 
     """
-    after_sample_reactor_volume = reactor_volume - sample_volume
-
-    for i in [
-        reactor_volume,
-        accumulated_feed,
-        sample_volume,
-    ]:
-        if np.isnan(i).sum() > 0:
-            msg = (
-                "Nan was found in either the reactor volume, accumulated feed or "
-                "the sample volume. Replace nan with an appropriate value."
-                "For example, if no sample was taken, the sample volume should be "
-                "set to 0."
-            )
-            raise ValueError(msg)
-        adf = accumulated_dilution_factor(
-            after_sample_reactor_volume, sample_volume
-        )
-
-    def fed_species_term(
-        accum_feed: NDArray,
-        conc_in_feed: Union[NDArray, float],
-        reactor_vol: NDArray,
-    ) -> NDArray[np.float64]:
-        """Calculate the feed in interval.
-
-        Prepend the first value of the accumulated feed to the array because the
-        is the feed added during the first interval.
-        """
-        feed_in_interval = np.diff(accum_feed, prepend=accum_feed[0])
-        return adf * feed_in_interval * conc_in_feed / reactor_vol
-
-    if len(np.shape(accumulated_feed)) == 1:
-        return measured_concentration * adf - np.cumsum(
-            fed_species_term(
-                accumulated_feed, concentration_in_feed, reactor_volume
-            )
-        )
-
-    # Iterate over the columns of the accumulated feed to calculate
-    # fed_species_term for each feed. Then calculate the row-wise sum of the
-    # fed_species_term.
-
-    fed_species_term_collection = np.zeros(np.shape(accumulated_feed)[0])
-    for i in range(np.shape(accumulated_feed)[1]):
-        fed_species_term_collection += fed_species_term(
-            accumulated_feed[:, i], concentration_in_feed[i], reactor_volume
-        )
-
-    return measured_concentration * adf - np.cumsum(fed_species_term_collection)
+    # The species is treated as a single column, with its concentration for
+    # each feed (or each time point) as a column vector.
+    return _pseudobatch_transform_batched(
+        measured_concentrations=np.reshape(measured_concentration, (-1, 1)),
+        reactor_volume=reactor_volume,
+        accumulated_feed=accumulated_feed,
+        concentration_in_feed=np.reshape(concentration_in_feed, (-1, 1)),
+        sample_volume=sample_volume,
+        dtype=dtype,
+    )[:, 0]
 
 
 def pseudobatch_transform_multiple(
@@ -162,9 +215,11 @@ def pseudobatch_transform_multiple(
     accumulated_feed: NDArray,
     concentration_in_feed: Union[Iterable, NDArray],
     sample_volume: NDArray,
+    dtype: DTypeLike = np.float64,
 ) -> NDArray:
-    """Perform the pseudo batch transformation on multiple species at once. This
-    function simply wraps the `pseudobatch_transform()` function.
+    """Perform the pseudo batch transformation on multiple species at once. The
+    dilution factor and feed calculations are shared by all species, so this is
+    faster than calling `pseudobatch_transform()` for each species.
 
     Parameters
     ----------
@@ -186,6 +241,10 @@ def pseudobatch_transform_multiple(
     sample_volume : NDArray
         a NDArray of the sample volumes at given time points. The array should
         contain 0 at timepoints where no samples was taken
+    dtype : DTypeLike, optional
+        the floating point type used for the calculation, by default
+        np.float64. The inputs are converted to contiguous arrays of this type.
+        See `pseudobatch_transform()` for when np.float32 is worth using.
 
     Returns
     -------
@@ -198,18 +257,15 @@ def pseudobatch_transform_multiple(
         "concentration_in_feed needs to be 2D. Either a row vector or column"
         " vector was given. Try using .reshape(1,-1)"
     )
-    assert len(concentration_in_feed.shape) == 2, bad_shape_msg
-    out_list = list()
-    for col in range(0, measured_concentrations.shape[1]):
-        transformed = pseudobatch_transform(
-            measured_concentration=measured_concentrations[:, col],
-            reactor_volume=reactor_volume,
-            accumulated_feed=accumulated_feed,
-            concentration_in_feed=concentration_in_feed[:, col],
-            sample_volume=sample_volume,
-        )
-        out_list.append(np.array([transformed]))
-    return np.concatenate(out_list).transpose()
+    assert concentration_in_feed.ndim == 2, bad_shape_msg
+    return _pseudobatch_transform_batched(
+        measured_concentrations=measured_concentrations,
+        reactor_volume=reactor_volume,
+        accumulated_feed=accumulated_feed,
+        concentration_in_feed=concentration_in_feed,
+        sample_volume=sample_volume,
+        dtype=dtype,
+    )
 
 
 def pseudobatch_transform_pandas(
@@ -222,6 +278,7 @@ def pseudobatch_transform_pandas(
     ],
     sample_volume_colname: str,
     pseudo_col_postfix: str = "_pseudo",
+    dtype: DTypeLike = np.float64,
 ) -> pd.DataFrame:
     """Apply pseudo batch transformation for several species from a dataframe.
 
@@ -269,6 +326,12 @@ def pseudobatch_transform_pandas(
         a string with the postfix to be added to the column names of the pseudo
         batch transformed data, by default "_pseudo"
 
+    dtype : DTypeLike, optional
+
+        the floating point type used for the calculation, by default
+        np.float64. The columns are converted to contiguous arrays of this
+        type. See `pseudobatch_transform()` for when np.float32 is worth using.
+
     Returns
     -------
 
@@ -313,20 +376,31 @@ def pseudobatch_transform_pandas(
                 )
 
 
-    out = pd.DataFrame()
-    for species, conc in zip(
-        measured_concentration_colnames, concentration_in_feed
-    ):
-        out[species + pseudo_col_postfix] = pseudobatch_transform(
-            measured_concentration=df[species].to_numpy(),
-            reactor_volume=df[reactor_volume_colname].to_numpy(),
-            accumulated_feed=df[accumulated_feed_colname].to_numpy(),
-            concentration_in_feed=conc,
-            sample_volume=df[sample_volume_colname].to_numpy(),
-        )
+    # Each column is extracted once and all species are transformed together.
+    # The species are the columns of the concentration matrix, and its rows
+    # are either the feeds or, for a single feed, the time points.
+    concentration_in_feed = np.column_stack(
+        np.broadcast_arrays(*concentration_in_feed)
+    )
+    transformed = _pseudobatch_transform_batched(
+        measured_concentrations=df[
+            list(measured_concentration_colnames)
+        ].to_numpy(),
+        reactor_volume=df[reactor_volume_colname].to_numpy(),
+        accumulated_feed=df[accumulated_feed_colname].to_numpy(),
+        concentration_in_feed=concentration_in_feed,
+        sample_volume=df[sample_volume_colname].to_numpy(),
+        dtype=dtype,
+    )
     # Copy the index from the original dataframe
-    out.index = df.index
-    return out
+    return pd.DataFrame(
+        transformed,
+        columns=[
+            species + pseudo_col_postfix
+            for species in measured_concentration_colnames
+        ],
+        index=df.index,
+    )
 
 
 def convert_volumetric_rates_from_pseudo_to_real(
@@ -353,7 +427,21 @@ def convert_volumetric_rates_from_pseudo_to_real(
 
 
     """
+    reactor_volume = np.ascontiguousarray(reactor_volume, dtype=np.float64)
+    sample_volume = np.ascontiguousarray(sample_volume, dtype=np.float64)
+    # accumulated_dilution_factor propagates nan, so it is rejected up front
+    # like in the pseudo batch transformation
+    if np.isnan(reactor_volume).any() or np.isnan(sample_volume).any():
+        msg = (
+            "Nan was found in either the reactor volume or the sample volume. "
+            "Replace nan with an appropriate value. For example, if no sample "
+            "was taken, the sample volume should be set to 0."
+        )
+        raise ValueError(msg)
     adf = accumulated_dilution_factor(
         reactor_volume - sample_volume, sample_volume
     )
-    return pseudo_volumetric_rates / adf
+    if isinstance(pseudo_volumetric_rates, pd.Series):
+        return pseudo_volumetric_rates / adf
+    # adf is not needed after this, so the result is written into it
+    return np.divide(pseudo_volumetric_rates, adf, out=adf)
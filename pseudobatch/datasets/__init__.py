@@ -2,5 +2,6 @@ from ._dataloaders import (
     load_standard_fedbatch, 
     load_product_inhibited_fedbatch, 
     load_cho_cell_like_fedbatch,
-    load_real_world_yeast_fedbatch
+    load_real_world_yeast_fedbatch,
+    load_all_simulated
 )
\ No newline at end of file
@@ -1,6 +1,17 @@
 """This modules provides functions to load the simulated datasets that are used in the tests and examples."""
-import pandas as pd
+import functools
 import pathlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+
+import pandas as pd
+
+
+@functools.lru_cache(maxsize=None)
+def _read_simulated_dataset(data_path: str) -> pd.DataFrame:
+    """Read a simulated dataset. The dataframe is cached, so it must not be
+    modified or handed out directly."""
+    return pd.read_csv(data_path)
 
 
 def _prepare_simulated_dataset(data_path: str, sampling_points_only: bool = False) -> pd.DataFrame:
@@ -15,23 +26,23 @@ def _prepare_simulated_dataset(data_path: str, sampling_points_only: bool = Fals
         Path to the csv file containing the simulated data.
     sampling_points_only : bool, optional
         If True, only the rows where a sample was taken is kept, by default False
-    """
 
-    fedbatch_df = (
-        pd.read_csv(data_path)
-        .drop_duplicates(subset="timestamp", keep="first")
-        .reset_index(
-            drop=True
-        )  # Reset the index to avoid gaps in index numbers from removed rows.
-        .fillna(
-            {"sample_volume": 0}
-        )  # Fill the sample volume column with 0 when no sample was taken.
-    )
+    The csv file is only parsed once, but each call returns a new dataframe.
+    """
 
+    fedbatch_df = _read_simulated_dataset(data_path)
+    # The duplicated timestamps are adjacent (before and after the sample), so
+    # comparing with the previous row is enough to keep the first of each.
+    timestamp = fedbatch_df["timestamp"]
+    keep = timestamp.ne(timestamp.shift())
     if sampling_points_only:
-        fedbatch_df = fedbatch_df[fedbatch_df["sample_volume"] > 0].reset_index(
-            drop=True
-        )
+        # rows without a sample have NaN sample volume, which compares False
+        keep &= fedbatch_df["sample_volume"] > 0
+    fedbatch_df = fedbatch_df[keep].reset_index(
+        drop=True
+    )  # Reset the index to avoid gaps in index numbers from removed rows.
+    # Fill the sample volume column with 0 when no sample was taken.
+    fedbatch_df["sample_volume"] = fedbatch_df["sample_volume"].fillna(0)
 
     return fedbatch_df
 
@@ -86,9 +97,45 @@ def load_cho_cell_like_fedbatch(sampling_points_only: bool = False):
     return _prepare_simulated_dataset(data_path, sampling_points_only=sampling_points_only)
 
 
+def load_all_simulated(sampling_points_only: bool = False) -> Dict[str, pd.DataFrame]:
+    """Load all the simulated fed-batch process datasets. The csv files are
+    read in parallel, which is useful when several datasets are needed, e.g.
+    in tests.
+
+    Parameters
+    ----------
+    sampling_points_only : bool, optional
+        If True, only the rows where a sample was taken is kept, by default False
+
+    Returns
+    -------
+    Dict[str, pd.DataFrame]
+        The datasets keyed by the name used in their loader function, e.g.
+        "standard_fedbatch" for load_standard_fedbatch.
+    """
+    loaders = {
+        "standard_fedbatch": load_standard_fedbatch,
+        "product_inhibited_fedbatch": load_product_inhibited_fedbatch,
+        "cho_cell_like_fedbatch": load_cho_cell_like_fedbatch,
+    }
+    with ThreadPoolExecutor(max_workers=len(loaders)) as executor:
+        futures = {
+            name: executor.submit(loader, sampling_points_only=sampling_points_only)
+            for name, loader in loaders.items()
+        }
+        return {name: future.result() for name, future in futures.items()}
+
+
+@functools.lru_cache(maxsize=None)
+def _read_real_world_dataset(data_path: str) -> pd.DataFrame:
+    """Read a real world dataset. The dataframe is cached, so callers must copy
+    it before handing it out."""
+    return pd.read_csv(data_path)
+
+
 def load_real_world_yeast_fedbatch():
     """Load the real world yeast fed-batch process dataset. This dataset
     is obtained from an experiment carried out in a biolector."""
 
     data_path = pathlib.Path(__file__).parent / "data" / "biolector_yeast_fedbatch.csv"
-    return pd.read_csv(data_path)
\ No newline at end of file
+    return _read_real_world_dataset(data_path).copy()
\ No newline at end of file
@@ -1,10 +1,11 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from enum import Enum
 from importlib.resources import files
-from typing import List, Optional, Union
+from typing import TYPE_CHECKING, Dict, List, Optional, Union
 
-import arviz as az
-
-from cmdstanpy import CmdStanModel
+import numpy as np
 from numpy.typing import NDArray
 from pydantic import BaseModel, Field, model_validator
 
@@ -14,7 +15,11 @@ from pseudobatch.util import (
     get_normal_params_from_quantiles,
 )
 
+if TYPE_CHECKING:
+    import arviz as az
+
 STAN_FILE = files(stan).joinpath("error_propagation.stan")
+CHAINS = 4
 
 
 class Distribution0d(str, Enum):
@@ -31,7 +36,10 @@ class Prior0d(BaseModel):
 
     @model_validator(mode="after")
     def check_locscale_or_pcts(cls, p: "Prior0d"):
-        """Either loc and scale should be specified or pct1 and pct99."""
+        """Either loc and scale should be specified or pct1 and pct99.
+
+        If only the percentiles are given, loc and scale are found from them.
+        """
         missing_locscale = [f for f in [p.loc, p.scale] if f is None]
         missing_pcts = [f for f in [p.pct1, p.pct99] if f is None]
         assert len(missing_locscale) != 1, f"Missing {missing_locscale[0]}"
@@ -39,23 +47,18 @@ class Prior0d(BaseModel):
         assert not (
             (len(missing_locscale) == 2) and (len(missing_pcts) == 2)
         ), "Prior input is all None."
-        return p
-
-    def __init__(self, **data):
-        super().__init__(**data)
-        if self.loc is None:
-            if self.distribution is Distribution0d.normal:
-                assert self.pct1 is not None
-                assert self.pct99 is not None
-                self.loc, self.scale = get_normal_params_from_quantiles(
-                    p1=0.01, x1=self.pct1, p2=0.99, x2=self.pct99
+        if p.loc is None:
+            assert p.pct1 is not None
+            assert p.pct99 is not None
+            if p.distribution is Distribution0d.normal:
+                p.loc, p.scale = get_normal_params_from_quantiles(
+                    p1=0.01, x1=p.pct1, p2=0.99, x2=p.pct99
                 )
-            elif self.distribution is Distribution0d.lognormal:
-                assert self.pct1 is not None
-                assert self.pct99 is not None
-                self.loc, self.scale = get_lognormal_params_from_quantiles(
-                    p1=0.01, x1=self.pct1, p2=0.99, x2=self.pct99
+            elif p.distribution is Distribution0d.lognormal:
+                p.loc, p.scale = get_lognormal_params_from_quantiles(
+                    p1=0.01, x1=p.pct1, p2=0.99, x2=p.pct99
                 )
+        return p
 
 
 class Prior0dNormal(Prior0d):
@@ -73,6 +76,25 @@ class PriorInput(BaseModel):
     prior_cfeed: Optional[List[Prior0dLogNormal]] = None
 
 
+@dataclass
+class ErrorPropagationDraws:
+    """Prior and posterior draws of the error propagation model, keyed by Stan
+    variable name."""
+
+    prior: Dict[str, NDArray]
+    posterior: Dict[str, NDArray]
+
+
+# fixed, very wide priors for the species amounts and non-zero feeds
+PRIOR_M = Prior0dLogNormal(pct1=1e-9, pct99=1e9)
+PRIOR_F = Prior0dLogNormal(pct1=1e-6, pct99=1e6)
+
+
+def _get_loc_scale_array(priors: List[Prior0d]) -> NDArray:
+    """Pack a list of priors into a 2 x len(priors) array of locs and scales."""
+    return np.array([(p.loc, p.scale) for p in priors], dtype=float).T
+
+
 def run_error_propagation(
     y_concentration: NDArray,
     y_reactor_volume: NDArray,
@@ -84,9 +106,10 @@ def run_error_propagation(
     sd_feed_in_interval: float,
     sd_concentration_in_feed: float,
     sd_sample_volume: float,
-    prior_input: dict,
+    prior_input: Union[dict, PriorInput],
     species_names: Optional[List[Union[str,int]]] = None,
-) -> az.InferenceData:
+    return_raw: bool = False,
+) -> Union["az.InferenceData", ErrorPropagationDraws]:
     """Run the error propagation analysis, returning and InferenceData object.
 
     Parameters
@@ -114,32 +137,52 @@ def run_error_propagation(
 
     sd_concentration_in_feed : Error for concentration in feed measurements. 
 
-    prior_input : Dictionary that can be used to load a PriorInput object.
+    prior_input : Dictionary that can be used to load a PriorInput object, or
+    a PriorInput object, which is used as is without being validated again.
 
     species_names: Optional List of species names. Must match the number of
     species with measured concentration.
 
+    return_raw: If True, skip building the InferenceData and return the draws
+    as NumPy arrays instead.
+
     Returns
     -------
-    az.InferenceData
+    az.InferenceData, or ErrorPropagationDraws if return_raw is True
 
     """
+    # converted once here, so the prior and posterior runs share the arrays
+    (
+        y_concentration,
+        y_reactor_volume,
+        y_feed_in_interval,
+        y_sample_volume,
+        y_concentration_in_feed,
+    ) = (
+        np.ascontiguousarray(y, dtype=np.float64)
+        for y in (
+            y_concentration,
+            y_reactor_volume,
+            y_feed_in_interval,
+            y_sample_volume,
+            y_concentration_in_feed,
+        )
+    )
     N, S = y_concentration.shape
-    pi = PriorInput.model_validate(prior_input)
+    pi = (
+        prior_input
+        if isinstance(prior_input, PriorInput)
+        else PriorInput.model_validate(prior_input)
+    )
     if pi.prior_cfeed is None:
         msg = (
             "If y_concentration_in_feed has non-zero elements, "
             "then prior_cfeed must not be None."
         )
         assert all(y == 0 for y in y_concentration_in_feed), msg
-        prior_cfeed = [[0. for _ in range(S)], [1. for _ in range(S)]]
+        prior_cfeed = np.array([np.zeros(S), np.ones(S)])
     else:
-        prior_cfeed = [
-            [p.loc for p in pi.prior_cfeed], 
-            [p.scale for p in pi.prior_cfeed]
-        ]
-    prior_m = [Prior0dLogNormal(pct1=1e-9, pct99=1e9) for _ in range(S)]
-    prior_f = Prior0dLogNormal(pct1=1e-6, pct99=1e6)
+        prior_cfeed = _get_loc_scale_array(pi.prior_cfeed)
     data = {
         "N": N,
         "S": S,
@@ -153,13 +196,16 @@ def run_error_propagation(
         "sigma_s": sd_sample_volume,
         "sigma_f": sd_feed_in_interval,
         "sigma_cfeed": sd_concentration_in_feed,
-        "prior_apump": [pi.prior_apump.loc, pi.prior_apump.scale],
-        "prior_as": [pi.prior_as.loc, pi.prior_as.scale],
-        "prior_v0": [pi.prior_v0.loc, pi.prior_v0.scale],
-        "prior_m": [[p.loc for p in prior_m], [p.scale for p in prior_m]],
-        "prior_f_nonzero": [prior_f.loc, prior_f.scale],
+        "prior_m": _get_loc_scale_array([PRIOR_M] * S),
         "prior_cfeed": prior_cfeed,
     }
+    scalar_priors = {
+        "prior_apump": pi.prior_apump,
+        "prior_as": pi.prior_as,
+        "prior_v0": pi.prior_v0,
+        "prior_f_nonzero": PRIOR_F,
+    }
+    data.update({k: [p.loc, p.scale] for k, p in scalar_priors.items()})
     if species_names is None:
         species_names = list(range(S))
     coords = {"sample": list(range(N)), "species": species_names}
@@ -175,9 +221,34 @@ def run_error_propagation(
     }
     data_prior = {**data, **{"likelihood": 0}}
     data_posterior = {**data, **{"likelihood": 1}}
-    model = CmdStanModel(stan_file=STAN_FILE)
-    mcmc_prior = model.sample(data=data_prior, show_progress=False)
-    mcmc_posterior = model.sample(data=data_posterior, show_progress=False)
+    # imported here as the package __init__ imports this module
+    from pseudobatch import get_error_propagation_model
+
+    model = get_error_propagation_model()
+    # The prior and posterior runs are independent, so run them side by side
+    # and split the cores between them.
+    sample_kwargs = {
+        "chains": CHAINS,
+        "parallel_chains": max(1, min(CHAINS, (os.cpu_count() or 1) // 2)),
+        "show_progress": False,
+    }
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        prior_future = executor.submit(
+            model.sample, data=data_prior, **sample_kwargs
+        )
+        posterior_future = executor.submit(
+            model.sample, data=data_posterior, **sample_kwargs
+        )
+        mcmc_prior = prior_future.result()
+        mcmc_posterior = posterior_future.result()
+    if return_raw:
+        return ErrorPropagationDraws(
+            prior=mcmc_prior.stan_variables(),
+            posterior=mcmc_posterior.stan_variables(),
+        )
+    # arviz is slow to import, so only load it when it is needed
+    import arviz as az
+
     return az.from_cmdstanpy(
         mcmc_posterior, prior=mcmc_prior, coords=coords, dims=dims
     )
@@ -6,7 +6,6 @@ Created on Wed Mar 29 23:03:57 2023
 """
 
 import pandas as pd
-import numpy as np
 from .data_correction import pseudobatch_transform_pandas
 from typing import Union, Literal, Tuple, List
 import pathlib
@@ -57,10 +56,18 @@ def process_excel_template(
     assert phase in ["1","2","all", 1, 2], "phase is not set to an allowable value of '1', '2' or 'all'"
     assert type(outlier_removal) is bool, "outlier_removal may only be True or False"
 
+    #Open the workbook once and read all the sheets that are needed from it
+    with pd.ExcelFile(file_name) as xl:
+        df = pd.read_excel(xl, 'Bioreactor_data',header=1)
+        feeds = pd.read_excel(xl, 'Feed definitions',header=0,nrows=3)
+        measurements = pd.read_excel(xl, 'Raw concentration data',header=0)
+        if outlier_removal == True or phase != 'all':
+            #Only the 5 rows with the phase bounds and outliers of the chosen phase are needed
+            first_row = 38 if phase in ['all','1'] else 88
+            phase_data = pd.read_excel(xl, 'Visualisations',header=0,skiprows=range(1,first_row+1),nrows=5)
+
     #Bioreactor data#
     
-    df = pd.read_excel(file_name, 'Bioreactor_data',header=1)
-    
     #Identify the biomass column
     bio_name = [col for col in df.columns if 'Biomass (' in col]
     assert len(bio_name) == 1, "The raw biomass column can't be identified. Only one column name beginning with 'Biomass (' is permitted"
@@ -88,13 +95,11 @@ def process_excel_template(
     df = df[col_list]
     
     #Feed media concentations
-    feeds = pd.read_excel(file_name, 'Feed definitions',header=0,nrows=3)
     #Clean up df to remove columns not needed
     feeds = feeds.drop(columns = feeds.columns[0])
     feeds = feeds.loc[:, ~feeds.columns.str.contains('^Unnamed')]
     
     #Raw concentration data
-    measurements = pd.read_excel(file_name, 'Raw concentration data',header=0)
     #Remove any columns with no measurements
     measurements = measurements.dropna(axis=1, how='all')
     
@@ -108,24 +113,24 @@ def process_excel_template(
     #Generate feed list
     feed_cpds = feeds.columns[1:].to_list()
     
-    #Calculate mismatches
-    measure_mm = list(set(measured_cpds).difference(feed_cpds))
+    #Calculate mismatches, keeping the order the compounds are given in
+    feed_idx = pd.Index(feed_cpds)
+    measure_mm = pd.Index(measured_cpds).difference(feed_idx, sort=False).to_list()
     
     if len(measure_mm) > 0:
         print("The following compounds are not defined in feeds but are measured. They are assumed to not be fed. Compounds: "+", ".join(measure_mm))
-        for cpd in measure_mm:
-            feeds[cpd] = 0    
+        feeds = feeds.assign(**{cpd: 0 for cpd in measure_mm})
     
     #If feed compound is not measured, possibly an error. We will assume an error as there is no need to define if not measured
     
-    feed_mm = list(set(feed_cpds).difference(measured_cpds))
+    feed_mm = feed_idx.difference(measured_cpds, sort=False)
     assert len(feed_mm) == 0, "A substrate in the feed is not measured. Check if this is in error; if not then remove substrate from feed."
     
     #Measurement and feed definition lists are now known to contain the same headers, we need to ensure that the order is conserved between the two.
     feeds = feeds[measured_cpds]
     
     #Finally, we need to define the list of feed concentrations
-    feed_conc = feeds.T.values.tolist()
+    feed_conc = feeds.to_numpy().T
     
     #As a further convenience, let's retain a list of whether a compound is fed or not. If fed, we will have to treat it different for rate calculations
     fed_cpds = feeds.any() #Returns a Boolean series if compound is in any of the feeds.
@@ -141,26 +146,27 @@ def process_excel_template(
     #We need a little bit of wrangling here - outlier values are based on corrected values in excel sheet. Will need to keep columns from bioreactor data and search across dataframes
     if outlier_removal == True or phase != 'all':
         mapper = dict(zip(mapping_df.iloc[:,2],mapping_df.iloc[:,0]))
-        phase_data = pd.read_excel(file_name, 'Visualisations',header=0)
     if phase in ['all','1']:
         if outlier_removal == True:
-            outliers = phase_data.iloc[40:43,1:]
+            outliers = phase_data.iloc[2:5,1:]
         if phase == "1":
-            bounds = phase_data.iloc[38:40,1:]    
+            bounds = phase_data.iloc[0:2,1:]    
       
     if phase == "2":
         if outlier_removal == True:
-            outliers = phase_data.iloc[90:93,1:]
-        bounds = phase_data.iloc[88:90,1:]  
+            outliers = phase_data.iloc[2:5,1:]
+        bounds = phase_data.iloc[0:2,1:]  
     
     if outlier_removal == True:
-        for col in outliers.columns:
-            outliers[col]=outliers[col].map(mapper)
+        #Only the measured compounds can be censored, the sheet has spare columns
+        outlier_cpds = outliers.columns.intersection(measured_cpds, sort=False)
+        outliers = outliers[outlier_cpds].apply(lambda s: s.map(mapper))
         #Censor flagged data - extract row info first
-        fedbatch_df_measurement.loc[fedbatch_df_measurement['Sample ID'].isin(outliers.loc[:,col].values), col] = np.nan
+        sample_ids = fedbatch_df_measurement['Sample ID']
+        censor = pd.DataFrame({cpd: sample_ids.isin(outliers[cpd]) for cpd in outlier_cpds})
+        fedbatch_df_measurement[outlier_cpds] = fedbatch_df_measurement[outlier_cpds].mask(censor)
     if phase != 'all':
-        for col in bounds.columns:
-           bounds[col]=bounds[col].map(mapper)
+        bounds = bounds.apply(lambda s: s.map(mapper))
 
             
     #Perform pseudobatch calculation
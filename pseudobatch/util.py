@@ -1,7 +1,7 @@
 from typing import Tuple
 
 import numpy as np
-from scipy.stats import norm
+from scipy.special import ndtri
 
 
 def get_normal_params_from_quantiles(
@@ -12,7 +12,7 @@ def get_normal_params_from_quantiles(
     i.e. get mu and sigma such that if X ~ normal(mu, sigma), then pr(X <
     x1) = p1 and pr(X < x2) = p2.
     """
-    ppf_low, ppf_high = (norm.ppf(x, scale=1) for x in [p1, p2])
+    ppf_low, ppf_high = (ndtri(x) for x in [p1, p2])
     mu = (x1 * ppf_high - x2 * ppf_low) / (ppf_high - ppf_low)
     sigma = (x2 - x1) / (ppf_high - ppf_low)
     return mu, sigma
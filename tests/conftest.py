@@ -9,10 +9,25 @@ import pytest
 sys.path.append(
     os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir))
 )
-from pseudobatch.datasets import load_cho_cell_like_fedbatch
+from pseudobatch.datasets import (
+    load_cho_cell_like_fedbatch,
+    load_standard_fedbatch,
+)
 
 
 ###################### SETUP SIMULATED DATA FIXTURES ################################
+def _add_concentrations(fedbatch_df: pd.DataFrame) -> pd.DataFrame:
+    """Add the concentrations and the volume before sampling, which are shared
+    by the fed-batch3 fixtures."""
+    volume = fedbatch_df["v_volume"].to_numpy()
+    return fedbatch_df.assign(
+        c_Biomass=fedbatch_df["m_Biomass"].to_numpy() / volume,
+        c_Glucose=fedbatch_df["m_Glucose"].to_numpy() / volume,
+        v_volume_before_sample=volume
+        + fedbatch_df["sample_volume"].fillna(0).to_numpy(),
+    )
+
+
 @pytest.fixture(scope="session")
 def simulated_fedbatch():
     """Loads simulated fed-batch dataset and takes only a few points to mimick
@@ -22,19 +37,7 @@ def simulated_fedbatch():
         subset="timestamp", keep="last"
     )  # ODE solver save both data before and after sampling event
     assert isinstance(fedbatch_df, pd.DataFrame)
-    # Calculating the concentrations
-    fedbatch_df["c_Biomass"] = (
-        fedbatch_df["m_Biomass"] / fedbatch_df["v_volume"]
-    )
-    fedbatch_df["c_Glucose"] = (
-        fedbatch_df["m_Glucose"] / fedbatch_df["v_volume"]
-    )
-
-    fedbatch_df["v_volume_before_sample"] = fedbatch_df[
-        "v_volume"
-    ] + fedbatch_df["sample_volume"].fillna(0)
-
-    return fedbatch_df
+    return _add_concentrations(fedbatch_df)
 
 
 @pytest.fixture(scope="session")
@@ -45,23 +48,17 @@ def simulated_fedbatch_measurements_only():
         "tests", "test_data", "fed-batch3_measurements_only.csv"
     )
     fedbatch_df = pd.read_csv(fedbatch_file, index_col=0)
-
-    # Calculating the concentrations
-    fedbatch_df["c_Biomass"] = (
-        fedbatch_df["m_Biomass"] / fedbatch_df["v_volume"]
-    )
-    fedbatch_df["c_Glucose"] = (
-        fedbatch_df["m_Glucose"] / fedbatch_df["v_volume"]
-    )
-
-    fedbatch_df["v_volume_before_sample"] = fedbatch_df[
-        "v_volume"
-    ] + fedbatch_df["sample_volume"].fillna(0)
-
-    return fedbatch_df
+    return _add_concentrations(fedbatch_df)
 
 
 @pytest.fixture(scope="session")
 def simulated_multiple_feeds():
     """ """
     return load_cho_cell_like_fedbatch()
+
+
+@pytest.fixture(scope="session")
+def standard_fedbatch():
+    """Standard fed-batch dataset shared by the tests that only read it. Tests
+    that modify the dataframe should work on a copy."""
+    return load_standard_fedbatch()
@@ -13,7 +13,7 @@ fedbatch_df = pd.read_csv(fedbatch_file, index_col=0)
 
 measurement_times = [10, 30, 40, 50]
 exact_measurements = (
-    fedbatch_df.query("timestamp.isin(@measurement_times)")
+    fedbatch_df[fedbatch_df["timestamp"].isin(measurement_times)]
     .drop_duplicates(
         subset="timestamp", keep="last"
     )  # ODE solver save both data before and after sampling event
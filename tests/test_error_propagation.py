@@ -1,10 +1,14 @@
+import threading
+import time
 from importlib.resources import files
 
 import numpy as np
 import pandas as pd
+import pytest
 from scipy.special import logit
 
-from pseudobatch import run_error_propagation
+import pseudobatch
+from pseudobatch import error_propagation, run_error_propagation
 from pseudobatch.datasets import data
 
 
@@ -20,7 +24,7 @@ EXAMPLE_PRIOR_INPUT = {
 }
 
 
-def test_error_propagation():
+def _example_run_kwargs():
     data_path = files(data).joinpath("standard_fed-batch_process.csv")
     species = ["Product", "Glucose", "Biomass"]
     samples = (
@@ -34,7 +38,7 @@ def test_error_propagation():
         )
         .reset_index()
     )
-    _ = run_error_propagation(
+    return dict(
         y_concentration=samples[["c_" + s for s in species]].values,
         y_reactor_volume=samples["v_Volume"].values,
         y_feed_in_interval=samples["v_feed_interval"].values,
@@ -47,3 +51,61 @@ def test_error_propagation():
         sd_sample_volume=0.05,
         sd_concentration_in_feed=0.05,
     )
+
+
+def test_error_propagation():
+    _ = run_error_propagation(**_example_run_kwargs())
+
+
+class _FakeFit:
+    def __init__(self, likelihood):
+        self.likelihood = likelihood
+
+    def stan_variables(self):
+        return {"likelihood": np.array([self.likelihood])}
+
+
+class _FakeModel:
+    """Stands in for the compiled Stan model and records each sample call."""
+
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def sample(self, data, **kwargs):
+        with self.lock:
+            self.calls.append((data, kwargs))
+        if data["likelihood"] == 0:
+            # finish the prior run last, so the results cannot be matched up
+            # by completion order
+            time.sleep(0.1)
+        return _FakeFit(data["likelihood"])
+
+
+@pytest.mark.parametrize("cpu_count", [None, 1, 2, 64])
+def test_error_propagation_samples_prior_and_posterior(monkeypatch, cpu_count):
+    """Test that the prior and posterior are sampled with the same data, apart
+    from the likelihood switch, and that the draws are returned in order."""
+    model = _FakeModel()
+    monkeypatch.setattr(
+        pseudobatch, "get_error_propagation_model", lambda: model
+    )
+    monkeypatch.setattr(error_propagation.os, "cpu_count", lambda: cpu_count)
+    run_kwargs = _example_run_kwargs()
+    draws = run_error_propagation(**run_kwargs, return_raw=True)
+
+    assert draws.prior["likelihood"][0] == 0
+    assert draws.posterior["likelihood"][0] == 1
+    assert sorted(data["likelihood"] for data, _ in model.calls) == [0, 1]
+    (prior_data, prior_kwargs), (posterior_data, posterior_kwargs) = sorted(
+        model.calls, key=lambda call: call[0]["likelihood"]
+    )
+    assert prior_data.keys() == posterior_data.keys()
+    for key in prior_data.keys() - {"likelihood"}:
+        np.testing.assert_array_equal(prior_data[key], posterior_data[key])
+    np.testing.assert_array_equal(
+        prior_data["y_c"], run_kwargs["y_concentration"]
+    )
+    assert prior_kwargs == posterior_kwargs
+    assert prior_kwargs["chains"] == error_propagation.CHAINS
+    assert 1 <= prior_kwargs["parallel_chains"] <= error_propagation.CHAINS
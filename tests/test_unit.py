@@ -1,52 +1,174 @@
+import pathlib
+
 import pytest
 import pandas as pd
 import numpy as np
 
 from pseudobatch import (
+    process_excel_template,
     pseudobatch_transform,
+    pseudobatch_transform_multiple,
     pseudobatch_transform_pandas,
 )
+from pseudobatch.data_correction import (
+    accumulated_dilution_factor,
+    convert_volumetric_rates_from_pseudo_to_real,
+)
 from pseudobatch.datasets import (
     load_standard_fedbatch,
     load_product_inhibited_fedbatch,
     load_cho_cell_like_fedbatch,
-    load_real_world_yeast_fedbatch
+    load_real_world_yeast_fedbatch,
+    load_all_simulated
 )
+from pseudobatch.datasets import _dataloaders
 import logging
-logging.basicConfig(level=logging.DEBUG)
 
 def test_input_contain_nan(simulated_fedbatch: pd.DataFrame):
-    # correct glucose data
-    with pytest.raises(ValueError) as _:
+    # the first rows are enough to hit the nan check, as the sample volume
+    # column contains nan when at times where no sample was taken
+    df = simulated_fedbatch.head(2)
+    with pytest.raises(ValueError, match="Nan was found"):
         pseudobatch_transform(
-            measured_concentration=simulated_fedbatch["c_Glucose"].to_numpy(),
-            reactor_volume=simulated_fedbatch[
-                "v_volume_before_sample"
-            ].to_numpy(),
-            accumulated_feed=simulated_fedbatch["v_feed_accum"].to_numpy(),
+            measured_concentration=df["c_Glucose"].to_numpy(),
+            reactor_volume=df["v_volume_before_sample"].to_numpy(),
+            accumulated_feed=df["v_feed_accum"].to_numpy(),
             concentration_in_feed=93.75,
-            sample_volume=simulated_fedbatch[
-                "sample_volume"
-            ].to_numpy(),  # the sample volume column contains nan when at times where no sample was taken
+            sample_volume=df["sample_volume"].to_numpy(),
         )
 
 
-def test_load_standard_fedbatch_unique_timestamps():
-    df = load_standard_fedbatch()
-    assert df.empty is False
-    assert df["timestamp"].duplicated().sum() == 0
+def test_accumulated_dilution_factor():
+    """Test the accumulated dilution factor against values computed by hand."""
+    after_sample_reactor_volume = np.array([100.0, 90.0, 108.0])
+    sample_volume = np.array([0.0, 10.0, 12.0])
+    adf = accumulated_dilution_factor(after_sample_reactor_volume, sample_volume)
+    np.testing.assert_allclose(adf, [1.0, 1.0, 1.0 * 120.0 / 90.0])
 
 
-def test_load_product_inhibited_fedbatch_unique_timestamps():
-    df = load_product_inhibited_fedbatch()
-    assert df.empty is False
-    assert df["timestamp"].duplicated().sum() == 0
+def test_convert_volumetric_rates_input_contain_nan():
+    """Test that nan volumes are rejected instead of propagating into the
+    converted rates."""
+    with pytest.raises(ValueError, match="Nan was found"):
+        convert_volumetric_rates_from_pseudo_to_real(
+            pseudo_volumetric_rates=np.array([1.0, 1.0, 1.0]),
+            reactor_volume=np.array([100.0, 100.0, 120.0]),
+            sample_volume=np.array([0.0, np.nan, 12.0]),
+        )
+
+
+def test_pseudobatch_transform_multiple_matches_single_species(
+    standard_fedbatch: pd.DataFrame,
+):
+    """Test that transforming all species at once gives the same result as
+    transforming them one at a time."""
+    df = standard_fedbatch
+    species = ["c_Biomass", "c_Glucose", "c_Product"]
+    concentration_in_feed = np.array([[0, df.s_f.iloc[0], 0]])
+    measured_concentrations = df[species].to_numpy()
+    reactor_volume = df["v_Volume"].to_numpy()
+    accumulated_feed = df["v_Feed_accum"].to_numpy()
+    sample_volume = df["sample_volume"].to_numpy()
+    transformed = pseudobatch_transform_multiple(
+        measured_concentrations=measured_concentrations,
+        reactor_volume=reactor_volume,
+        accumulated_feed=accumulated_feed,
+        concentration_in_feed=concentration_in_feed,
+        sample_volume=sample_volume,
+    )
+    for col in range(len(species)):
+        expected = pseudobatch_transform(
+            measured_concentration=measured_concentrations[:, col],
+            reactor_volume=reactor_volume,
+            accumulated_feed=accumulated_feed,
+            concentration_in_feed=concentration_in_feed[0, col],
+            sample_volume=sample_volume,
+        )
+        np.testing.assert_allclose(transformed[:, col], expected)
 
 
-def test_load_cho_cell_like_fedbatch_unique_timestamps():
-    df = load_cho_cell_like_fedbatch()
+def test_pseudobatch_transform_float32(standard_fedbatch: pd.DataFrame):
+    """Test that the transformation can run in single precision."""
+    df = standard_fedbatch
+    kwargs = dict(
+        measured_concentration=df["c_Glucose"].to_numpy(),
+        reactor_volume=df["v_Volume"].to_numpy(),
+        accumulated_feed=df["v_Feed_accum"].to_numpy(),
+        concentration_in_feed=df.s_f.iloc[0],
+        sample_volume=df["sample_volume"].to_numpy(),
+    )
+    transformed = pseudobatch_transform(**kwargs, dtype=np.float32)
+    assert transformed.dtype == np.float32
+    np.testing.assert_allclose(
+        transformed, pseudobatch_transform(**kwargs), rtol=1e-4, atol=1e-8
+    )
+
+
+def test_pseudobatch_transform_pandas_float32(standard_fedbatch: pd.DataFrame):
+    """Test that the pandas interface forwards the dtype."""
+    transformed_df = pseudobatch_transform_pandas(
+        df=standard_fedbatch,
+        measured_concentration_colnames="c_Glucose",
+        reactor_volume_colname="v_Volume",
+        accumulated_feed_colname="v_Feed_accum",
+        concentration_in_feed=standard_fedbatch.s_f.iloc[0],
+        sample_volume_colname="sample_volume",
+        dtype=np.float32,
+    )
+    assert transformed_df["c_Glucose_pseudo"].dtype == np.float32
+
+
+@pytest.mark.parametrize(
+    "loader",
+    [
+        load_standard_fedbatch,
+        load_product_inhibited_fedbatch,
+        load_cho_cell_like_fedbatch,
+    ],
+)
+def test_load_simulated_unique_timestamps(loader):
+    df = loader()
     assert df.empty is False
-    assert df["timestamp"].duplicated().sum() == 0
+    assert df["timestamp"].is_unique
+
+
+def test_load_standard_fedbatch_returns_independent_copies():
+    """Test that modifying a loaded dataset does not affect later loads."""
+    df = load_standard_fedbatch()
+    df["c_Biomass"] = 0.0
+    assert (load_standard_fedbatch()["c_Biomass"] != 0.0).any()
+
+
+def test_prepare_simulated_dataset_returns_independent_frames():
+    """Test that modifying a prepared dataset, as the article notebooks do,
+    does not affect later loads of the same file."""
+    data_path = (
+        pathlib.Path(_dataloaders.__file__).parent
+        / "data"
+        / "standard_fed-batch_process.csv"
+    )
+    df = _dataloaders._prepare_simulated_dataset(data_path)
+    df["c_Biomass_pseudo"] = 0.0
+    df["c_Biomass"] = 0.0
+    for reloaded in [
+        _dataloaders._prepare_simulated_dataset(data_path),
+        load_standard_fedbatch(),
+    ]:
+        assert "c_Biomass_pseudo" not in reloaded.columns
+        assert (reloaded["c_Biomass"] != 0.0).any()
+
+
+def test_load_all_simulated_matches_individual_loaders():
+    datasets = load_all_simulated(sampling_points_only=True)
+    assert set(datasets) == {
+        "standard_fedbatch",
+        "product_inhibited_fedbatch",
+        "cho_cell_like_fedbatch",
+    }
+    pd.testing.assert_frame_equal(
+        datasets["standard_fedbatch"],
+        load_standard_fedbatch(sampling_points_only=True),
+    )
 
 
 def test_load_real_world_yeast_fedbatch():
@@ -57,9 +179,11 @@ def test_load_real_world_yeast_fedbatch():
     assert df.shape == (11400, 12), "The dataset has changed. Update the test."
 
 
-def test_pseudobatch_transform_pandas_preserves_index():
+def test_pseudobatch_transform_pandas_preserves_index(
+    standard_fedbatch: pd.DataFrame,
+):
     """Test that the index of the input dataframe is preserved in the output dataframe."""
-    df = load_standard_fedbatch()
+    df = standard_fedbatch.copy(deep=False)
 
     # change index to something else
     df.index = np.arange(1000, 1000 + len(df))
@@ -74,10 +198,12 @@ def test_pseudobatch_transform_pandas_preserves_index():
     assert df.index.equals(transformed_df.index)
 
 
-def test_pseudobatch_transform_pandas_validation_missing_concentration_in_feed():
+def test_pseudobatch_transform_pandas_validation_missing_concentration_in_feed(
+    standard_fedbatch: pd.DataFrame,
+):
     """Test that the validation fails when the number of measured_concentration_colnames is
     not equal to the number of length of concentration in feed."""
-    df = load_standard_fedbatch()
+    df = standard_fedbatch
 
     # missing concentration in feed data
     with pytest.raises(ValueError) as _:
@@ -91,14 +217,16 @@ def test_pseudobatch_transform_pandas_validation_missing_concentration_in_feed()
         )
 
 
-def test_pseudobatch_transform_pandas_validation_multiple_feeds():
+def test_pseudobatch_transform_pandas_validation_multiple_feeds(
+    simulated_multiple_feeds: pd.DataFrame,
+):
     """Tests that validation fails if the concentration_in_feed is incorectly formatted,
     when multiple feeds are used.
     
     In this test the inner lists in concentration_in_feed iterates over the measured_concentration_colnames
     this is WRONG. The inner lists should iterate over the feeds."""
 
-    df = load_cho_cell_like_fedbatch()
+    df = simulated_multiple_feeds
 
     with pytest.raises(ValueError) as _:
         pseudobatch_transform_pandas(
@@ -109,4 +237,23 @@ def test_pseudobatch_transform_pandas_validation_multiple_feeds():
             concentration_in_feed=[[df.c_Glucose_feed1.iloc[0] , 0, df.c_Glutamate_feed1], [0, 0, df.c_Glutamate_feed2]],
             sample_volume_colname="sample_volume",
         )
-    
\ No newline at end of file
+
+
+def test_process_excel_template_outlier_removal():
+    """Test that samples flagged in the template are censored for each compound
+    and that no other columns are added."""
+    file_name = (
+        pathlib.Path(__file__).parent.parent
+        / "excel-pseudobatch"
+        / "Pseudo_batch_template_example_2.xlsx"
+    )
+    kept, _, _, _ = process_excel_template(file_name, phase="1")
+    censored, _, _, _ = process_excel_template(
+        file_name, phase="1", outlier_removal=True
+    )
+    assert list(censored.columns) == list(kept.columns)
+    flagged = censored["Sample ID"].isin(["S0", "S16", "S17"])
+    assert censored.loc[flagged, "Glucose\n(mM)"].isna().all()
+    assert censored.loc[~flagged, "Glucose\n(mM)"].equals(
+        kept.loc[~flagged, "Glucose\n(mM)"]
+    )